@@ -3,7 +3,6 @@ from __future__ import absolute_import
 import os
 import re
 
-from copy import deepcopy
 from typing import Any
 from typing import Callable
 from typing import Dict
@@ -12,6 +11,7 @@ from typing import Optional
 from conda_lock._vendor.poetry.locations import CACHE_DIR
 from conda_lock._vendor.poetry.utils._compat import Path
 from conda_lock._vendor.poetry.utils._compat import basestring
+from conda_lock._vendor.poetry.utils._compat import lru_cache
 
 from .config_source import ConfigSource
 from .dict_config_source import DictConfigSource
@@ -19,6 +19,13 @@ from .dict_config_source import DictConfigSource
 
 _NOT_SET = object()
 
+_FORMAT_RE = re.compile(r"{(.+?)}")
+
+
+@lru_cache(maxsize=256)
+def _setting_to_env(setting_name):  # type: (str) -> str
+    return "POETRY_" + setting_name.upper().replace("-", "_").replace(".", "_")
+
 
 def boolean_validator(val):
     return val in {"true", "false", "1", "0"}
@@ -28,9 +35,24 @@ def boolean_normalizer(val):
     return val in ["true", "1"]
 
 
-class Config(object):
+def path_normalizer(val):
+    return str(Path(val))
+
+
+def _identity_normalizer(val):
+    return val
+
+
+_NORMALIZERS = {
+    "virtualenvs.create": boolean_normalizer,
+    "virtualenvs.in-project": boolean_normalizer,
+    "installer.parallel": boolean_normalizer,
+    "virtualenvs.path": path_normalizer,
+}  # type: Dict[str, Callable]
+
 
-    default_config = {
+def _make_default_config():  # type: () -> Dict[str, Any]
+    return {
         "cache-dir": str(CACHE_DIR),
         "virtualenvs": {
             "create": True,
@@ -41,14 +63,20 @@ class Config(object):
         "installer": {"parallel": True},
     }
 
+
+class Config(object):
+
+    default_config = _make_default_config()
+
     def __init__(
         self, use_environment=True, base_dir=None
     ):  # type: (bool, Optional[Path]) -> None
-        self._config = deepcopy(self.default_config)
+        self._config = _make_default_config()
         self._use_environment = use_environment
         self._base_dir = base_dir
         self._config_source = DictConfigSource()
         self._auth_config_source = DictConfigSource()
+        self._raw_value_cache = {}  # type: Dict[str, Any]
 
     @property
     def name(self):
@@ -68,11 +96,13 @@ class Config(object):
 
     def set_config_source(self, config_source):  # type: (ConfigSource) -> Config
         self._config_source = config_source
+        self._raw_value_cache.clear()
 
         return self
 
     def set_auth_config_source(self, config_source):  # type: (ConfigSource) -> Config
         self._auth_config_source = config_source
+        self._raw_value_cache.clear()
 
         return self
 
@@ -80,22 +110,42 @@ class Config(object):
         from conda_lock._vendor.poetry.utils.helpers import merge_dicts
 
         merge_dicts(self._config, config)
+        self._raw_value_cache.clear()
 
     def all(self):  # type: () -> Dict[str, Any]
-        def _all(config, parent_key=""):
-            all_ = {}
+        return self._expand_table(self.config, "")
+
+    def _expand_table(
+        self, table, prefix
+    ):  # type: (Dict[str, Any], str) -> Dict[str, Any]
+        """
+        Resolve all the settings of an already located table.
+
+        The raw configuration is walked once and only its leaves are resolved,
+        instead of looking up every key again from the root.
+        """
+        all_ = {}
+
+        for key, value in table.items():
+            setting_name = prefix + key
+            if isinstance(value, dict):
+                all_[key] = self._expand_table(value, setting_name + ".")
+                continue
 
-            for key in config:
-                value = self.get(parent_key + key)
-                if isinstance(value, dict):
-                    all_[key] = _all(config[key], parent_key=key + ".")
-                    continue
+            all_[key] = self._resolve_leaf(setting_name, value)
 
-                all_[key] = value
+        return all_
 
-            return all_
+    def _resolve_leaf(self, setting_name, value):  # type: (str, Any) -> Any
+        """
+        Apply a POETRY_* environment override, if any, and process the value.
+        """
+        if self._use_environment:
+            env_value = os.getenv(_setting_to_env(setting_name), _NOT_SET)
+            if env_value is not _NOT_SET:
+                value = self._get_normalizer(setting_name)(env_value)
 
-        return _all(self.config)
+        return self.process(value)
 
     def raw(self):  # type: () -> Dict[str, Any]
         return self._config
@@ -104,32 +154,36 @@ class Config(object):
         """
         Retrieve a setting value.
         """
-        keys = setting_name.split(".")
-
-        # Looking in the environment if the setting
-        # is set via a POETRY_* environment variable
-        if self._use_environment:
-            env = "POETRY_{}".format(
-                "_".join(k.upper().replace("-", "_") for k in keys)
+        # Walks of the raw configuration without an explicit default are
+        # memoized until the configuration is merged or its sources are
+        # replaced. POETRY_* environment overrides and placeholders are still
+        # resolved on every call.
+        if default is None and setting_name in self._raw_value_cache:
+            return self._resolve_leaf(
+                setting_name, self._raw_value_cache[setting_name]
             )
-            value = os.getenv(env, _NOT_SET)
-            if value is not _NOT_SET:
-                return self.process(self._get_normalizer(setting_name)(value))
 
         value = self._config
-        for key in keys:
+        for key in setting_name.split("."):
             if key not in value:
-                return self.process(default)
+                value = default
+                break
 
             value = value[key]
 
-        return self.process(value)
+        if default is None:
+            self._raw_value_cache[setting_name] = value
+
+        return self._resolve_leaf(setting_name, value)
 
     def process(self, value):  # type: (Any) -> Any
         if not isinstance(value, basestring):
             return value
 
-        return re.sub(r"{(.+?)}", lambda m: self.get(m.group(1)), value)
+        if "{" not in value:
+            return value
+
+        return _FORMAT_RE.sub(lambda m: self.get(m.group(1)), value)
 
     def _get_validator(self, name):  # type: (str) -> Callable
         if name in {
@@ -143,14 +197,4 @@ class Config(object):
             return str
 
     def _get_normalizer(self, name):  # type: (str) -> Callable
-        if name in {
-            "virtualenvs.create",
-            "virtualenvs.in-project",
-            "installer.parallel",
-        }:
-            return boolean_normalizer
-
-        if name == "virtualenvs.path":
-            return lambda val: str(Path(val))
-
-        return lambda val: val
+        return _NORMALIZERS.get(name, _identity_normalizer)
@@ -5,6 +5,7 @@ import stat
 import tempfile
 
 from contextlib import contextmanager
+from functools import lru_cache
 from typing import Any
 from typing import Iterator
 from typing import List
@@ -23,6 +24,7 @@ except ImportError:
 _canonicalize_regex = re.compile(r"[-_]+")
 
 
+@lru_cache(maxsize=1024)
 def canonicalize_name(name):  # type: (str) -> str
     return _canonicalize_regex.sub("-", name).lower()
 
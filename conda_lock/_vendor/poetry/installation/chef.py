@@ -1,5 +1,6 @@
 import hashlib
 import json
+import os
 
 from typing import TYPE_CHECKING
 
@@ -22,8 +23,8 @@ class Chef:
     def __init__(self, config, env):  # type: (Config, Env) -> None
         self._config = config
         self._env = env
-        self._cache_dir = (
-            Path(config.get("cache-dir")).expanduser().joinpath("artifacts")
+        self._cache_dir = Path(
+            os.path.join(os.path.expanduser(config.get("cache-dir")), "artifacts")
         )
 
     def prepare(self, archive):  # type: (Path) -> Path
@@ -32,6 +32,17 @@ from .operations.uninstall import Uninstall
 from .operations.update import Update
 
 
+# This should be directly handled by ThreadPoolExecutor
+# however, on some systems the number of CPUs cannot be determined
+# (it raises a NotImplementedError), so, in this case, we assume
+# that the system only has one CPU.
+# The CPU count does not change during a run, so it is only queried once.
+try:
+    _DEFAULT_MAX_WORKERS = cpu_count() + 4
+except NotImplementedError:
+    _DEFAULT_MAX_WORKERS = 5
+
+
 class Executor(object):
     def __init__(self, env, pool, config, io, parallel=None):
         self._env = env
@@ -47,14 +58,7 @@ class Executor(object):
             parallel = config.get("installer.parallel", True)
 
         if parallel and not (PY2 and WINDOWS):
-            # This should be directly handled by ThreadPoolExecutor
-            # however, on some systems the number of CPUs cannot be determined
-            # (it raises a NotImplementedError), so, in this case, we assume
-            # that the system only has one CPU.
-            try:
-                self._max_workers = cpu_count() + 4
-            except NotImplementedError:
-                self._max_workers = 5
+            self._max_workers = _DEFAULT_MAX_WORKERS
         else:
             self._max_workers = 1
 
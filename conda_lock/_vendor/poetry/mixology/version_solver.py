@@ -55,7 +55,8 @@ class VersionSolver:
         if use_latest is None:
             use_latest = []
 
-        self._use_latest = use_latest
+        # Membership is checked for every candidate dependency, so keep a set.
+        self._use_latest = frozenset(use_latest)
 
         self._incompatibilities = {}  # type: Dict[str, List[Incompatibility]]
         self._solution = PartialSolution()
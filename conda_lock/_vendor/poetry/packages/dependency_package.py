@@ -5,6 +5,9 @@ from conda_lock._vendor.poetry.core.packages.package import Package
 
 
 class DependencyPackage(object):
+
+    __slots__ = ("_dependency", "_package")
+
     def __init__(self, dependency, package):  # type: (Dependency, Package) -> None
         self._dependency = dependency
         self._package = package
@@ -10,13 +10,15 @@ class PackageCollection(list):
 
         super(PackageCollection, self).__init__()
 
-        for package in packages:
-            self.append(package)
+        super(PackageCollection, self).extend(
+            self._wrap(package) for package in packages
+        )
 
-    def append(self, package):
+    def _wrap(self, package):
         if isinstance(package, DependencyPackage):
             package = package.package
 
-        package = DependencyPackage(self._dependency, package)
+        return DependencyPackage(self._dependency, package)
 
-        return super(PackageCollection, self).append(package)
+    def append(self, package):
+        return super(PackageCollection, self).append(self._wrap(package))
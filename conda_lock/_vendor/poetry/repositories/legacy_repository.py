@@ -3,6 +3,7 @@ import re
 import warnings
 
 from collections import defaultdict
+from typing import Dict
 from typing import Generator
 from typing import Optional
 from typing import Union
@@ -160,6 +161,10 @@ class Page:
 
 
 class LegacyRepository(PyPiRepository):
+
+    # Maximum number of parsed pages kept in memory by _get()
+    _max_cached_pages = 128
+
     def __init__(
         self, name, url, config=None, disable_cache=False, cert=None, client_cert=None
     ):  # type: (str, str, Optional[Config], bool, Optional[Path], Optional[Path]) -> None
@@ -193,6 +198,10 @@ class LegacyRepository(PyPiRepository):
             self._basic_auth = requests.auth.HTTPBasicAuth(username, password)
 
         self._disable_cache = disable_cache
+        # Parsed pages by endpoint, so that looking up the links and the release
+        # info of the same package does not fetch and parse its page twice.
+        # Bypassed when the cache is disabled.
+        self._pages = {}  # type: Dict[str, Page]
 
     @property
     def cert(self):  # type: () -> Optional[Path]
@@ -383,6 +392,9 @@ class LegacyRepository(PyPiRepository):
         return data.asdict()
 
     def _get(self, endpoint):  # type: (str) -> Union[Page, None]
+        if not self._disable_cache and endpoint in self._pages:
+            return self._pages[endpoint]
+
         url = self._url + endpoint
         try:
             response = self.session.get(url)
@@ -407,4 +419,11 @@ class LegacyRepository(PyPiRepository):
                 level="debug",
             )
 
-        return Page(response.url, response.content, response.headers)
+        page = Page(response.url, response.content, response.headers)
+        if not self._disable_cache:
+            if len(self._pages) >= self._max_cached_pages:
+                # Evict the oldest page
+                del self._pages[next(iter(self._pages))]
+            self._pages[endpoint] = page
+
+        return page
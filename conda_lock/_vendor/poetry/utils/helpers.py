@@ -14,6 +14,7 @@ from conda_lock._vendor.poetry.config.config import Config
 from conda_lock._vendor.poetry.core.packages.package import Package
 from conda_lock._vendor.poetry.core.version import Version
 from conda_lock._vendor.poetry.utils._compat import Path
+from conda_lock._vendor.poetry.utils._compat import lru_cache
 
 
 try:
@@ -25,6 +26,7 @@ except ImportError:
 _canonicalize_regex = re.compile("[-_]+")
 
 
+@lru_cache(maxsize=1024)
 def canonicalize_name(name):  # type: (str) -> str
     return _canonicalize_regex.sub("-", name).lower()
 
@@ -84,10 +86,14 @@ def safe_rmtree(path):
 
 def merge_dicts(d1, d2):
     for k, v in d2.items():
-        if k in d1 and isinstance(d1[k], dict) and isinstance(d2[k], Mapping):
-            merge_dicts(d1[k], d2[k])
+        if isinstance(v, Mapping):
+            # Incoming tables (TOML documents use dict subclasses) are merged
+            # into the existing table, or copied into a new plain dict.
+            if not isinstance(d1.get(k), dict):
+                d1[k] = {}
+            merge_dicts(d1[k], v)
         else:
-            d1[k] = d2[k]
+            d1[k] = v
 
 
 def download_file(
@@ -73,7 +73,6 @@ from conda_lock.lookup import set_lookup_location
 from conda_lock.models.channel import Channel
 from conda_lock.models.lock_spec import LockSpecification
 from conda_lock.models.pip_repository import PipRepository
-from conda_lock.pypi_solver import solve_pypi
 from conda_lock.src_parser import make_lock_spec
 from conda_lock.virtual_package import (
     default_virtual_package_repodata,
@@ -757,6 +756,10 @@ def _solve_for_arch(
     if requested_deps_by_name["pip"]:
         if "python" not in conda_deps:
             raise ValueError("Got pip specs without Python")
+        # Importing the PyPI solver loads the vendored Poetry, so only do it when
+        # there are pip dependencies to solve.
+        from conda_lock.pypi_solver import solve_pypi
+
         pip_deps = solve_pypi(
             requested_deps_by_name["pip"],
             use_latest=update_spec.update,
@@ -15,10 +15,12 @@ import yaml
 
 from typing_extensions import TypedDict
 
-from conda_lock.interfaces.vendored_conda import MatchSpec
-from conda_lock.interfaces.vendored_poetry import (
+# Import the exception directly rather than through the vendored_poetry interface,
+# which would load all of Poetry whenever conda-lock starts up.
+from conda_lock._vendor.poetry.utils._compat import (
     CalledProcessError as PoetryCalledProcessError,
 )
+from conda_lock.interfaces.vendored_conda import MatchSpec
 from conda_lock.invoke_conda import (
     PathLike,
     _get_conda_flags,
@@ -226,10 +228,12 @@ def _get_repodata_record(
     for retry in range(1, NUM_RETRIES + 1):
         for pkgs_dir in pkgs_dirs:
             record = pkgs_dir / dist_name / "info" / "repodata_record.json"
-            if record.exists():
+            try:
                 with open(record) as f:
                     repodata: FetchAction = json.load(f)
-                return repodata
+            except FileNotFoundError:
+                continue
+            return repodata
         logger.warn(
             f"Failed to find repodata_record.json for {dist_name}. "
             f"Retrying in 0.1 seconds ({retry}/{NUM_RETRIES})"
@@ -17,6 +17,16 @@ from conda_lock.lookup import conda_name_to_pypi_name
 from conda_lock.models.lock_spec import Dependency
 
 
+# Prefer libyaml's C parser and emitter; the pure-Python ones dominate the time spent
+# reading and writing large lockfiles.
+try:
+    from yaml import CDumper as _YamlDumper
+    from yaml import CSafeLoader as _YamlSafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import Dumper as _YamlDumper  # type: ignore[assignment]
+    from yaml import SafeLoader as _YamlSafeLoader  # type: ignore[assignment]
+
+
 class MissingLockfileVersion(ValueError):
     pass
 
@@ -139,7 +149,7 @@ def parse_conda_lock_file(path: pathlib.Path) -> Lockfile:
         raise FileNotFoundError(f"{path} not found")
 
     with path.open() as f:
-        content = yaml.safe_load(f)
+        content = yaml.load(f, Loader=_YamlSafeLoader)
     version = content.pop("version", None)
     if version == 1:
         lockfile = lockfile_v1_to_v2(LockfileV1.parse_obj(content))
@@ -214,4 +224,4 @@ def write_conda_lock_file(
                 """
             )
         output = content.to_v1().dict_for_output()
-        yaml.dump(output, stream=f, sort_keys=False)
+        yaml.dump(output, stream=f, sort_keys=False, Dumper=_YamlDumper)
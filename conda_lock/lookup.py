@@ -9,6 +9,13 @@ from packaging.utils import NormalizedName, canonicalize_name
 from typing_extensions import TypedDict
 
 
+# The mapping is large, so prefer libyaml's C parser when it is available.
+try:
+    from yaml import CSafeLoader as _YamlSafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlSafeLoader  # type: ignore[assignment]
+
+
 class MappingEntry(TypedDict):
     conda_name: str
     # legacy field, generally not used by anything anymore
@@ -50,7 +57,7 @@ class _LookupLoader:
             else:
                 path = url
             content = Path(path).read_bytes()
-        lookup = yaml.safe_load(content)
+        lookup = yaml.load(content, Loader=_YamlSafeLoader)
         # lowercase and kebabcase the pypi names
         assert lookup is not None
         lookup = {canonicalize_name(k): v for k, v in lookup.items()}
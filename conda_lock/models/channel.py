@@ -32,14 +32,14 @@ will be handled correctly by conda/mamba.
 
 """
 
-import copy
+import functools
 import logging
 import os
 import re
 import typing
 
 from posixpath import expandvars
-from typing import FrozenSet, List, Optional, cast
+from typing import FrozenSet, List, Optional, Tuple, cast
 from urllib.parse import unquote, urlparse, urlunparse
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -73,13 +73,7 @@ class CondaUrl(BaseModel):
     def conda_token_replaced_url(self) -> str:
         """This is basically a crazy thing that conda does for the token replacement in the output"""
         # TODO: pass in env vars maybe?
-        expanded_url = expandvars(self.env_var_url)
-        if token_pattern.match(expanded_url):
-            replaced = token_pattern.sub(r"\1\3", expanded_url, 1)
-            p = urlparse(replaced)
-            replaced = urlunparse(p._replace(path="/t/<TOKEN>" + p.path))
-            return replaced
-        return expanded_url
+        return _conda_token_replaced(expandvars(self.env_var_url))
 
 
 class ZeroValRepr(BaseModel):
@@ -99,10 +93,14 @@ class Channel(ZeroValRepr, BaseModel):
     def from_string(cls, value: str) -> "Channel":
         if "://" in value:
             # url like string
-            return cls.from_conda_url(CondaUrl.from_string(value))
+            if "@" in value or "/t/" in value:
+                # Credentials are matched against the current environment
+                # variables, so the result cannot be cached.
+                return cls.from_conda_url(CondaUrl.from_string(value))
+            return _channel_from_plain_url(value)
         else:
             # this is a simple url
-            return Channel(url=value, used_env_vars=frozenset([]))
+            return _channel_from_name(value)
 
     @classmethod
     def from_conda_url(cls, value: CondaUrl) -> "Channel":
@@ -115,19 +113,45 @@ class Channel(ZeroValRepr, BaseModel):
             used_env_vars=frozenset(cast(FrozenSet[str], env_vars)),
         )
 
+    def __hash__(self) -> int:
+        # used_env_vars is derived from the url, so the url alone identifies a channel
+        return hash(self.url)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Channel):
+            return NotImplemented
+        return self.url == other.url
+
     def env_replaced_url(self) -> str:
         return expandvars(self.url)
 
     def conda_token_replaced_url(self) -> str:
         """This is basically a crazy thing that conda does for the token replacement in the output"""
         # TODO: pass in env vars maybe?
-        expanded_url = expandvars(self.url)
-        if token_pattern.match(expanded_url):
-            replaced = token_pattern.sub(r"\1\3", expanded_url, 1)
-            p = urlparse(replaced)
-            replaced = urlunparse(p._replace(path="/t/<TOKEN>" + p.path))
-            return replaced
-        return expanded_url
+        return _conda_token_replaced(expandvars(self.url))
+
+
+@functools.lru_cache(maxsize=1024)
+def _conda_token_replaced(expanded_url: str) -> str:
+    """Shared, cached implementation of conda_token_replaced_url"""
+    if "/t/" in expanded_url and token_pattern.match(expanded_url):
+        replaced = token_pattern.sub(r"\1\3", expanded_url, 1)
+        p = urlparse(replaced)
+        replaced = urlunparse(p._replace(path="/t/<TOKEN>" + p.path))
+        return replaced
+    return expanded_url
+
+
+@functools.lru_cache(maxsize=1024)
+def _channel_from_name(value: str) -> Channel:
+    """Build a channel given by name only (e.g. "conda-forge"), interning the result"""
+    return Channel(url=value, used_env_vars=frozenset([]))
+
+
+@functools.lru_cache(maxsize=1024)
+def _channel_from_plain_url(value: str) -> Channel:
+    """Build a channel from a url without credentials, interning the result"""
+    return Channel.from_conda_url(CondaUrl.from_string(value))
 
 
 def _detect_used_env_var(
@@ -140,16 +164,22 @@ def _detect_used_env_var(
 
     if value.startswith("$"):
         return value.lstrip("$").strip("{}")
+    # Scan the environment once for the variables holding the value, either as
+    # given or unquoted. When several variables match, the last one wins.
+    unquoted_value = unquote(value)
+    simple_matches: List[Tuple[str, str]] = []
+    unquoted_matches: List[Tuple[str, str]] = []
+    for k, v in os.environ.items():
+        if v == value:
+            simple_matches.append((k.upper(), k))
+        if v == unquoted_value:
+            unquoted_matches.append((k.upper(), k))
     for suffix in [*preferred_env_var_suffix, ""]:
-        candidates = {v: k for k, v in os.environ.items() if k.upper().endswith(suffix)}
-        # try first with a simple match
-        key = candidates.get(value)
-        if key:
-            return key
-        # try with unquote
-        key = candidates.get(unquote(value))
-        if key:
-            return key
+        # try first with a simple match, then with unquote
+        for matches in (simple_matches, unquoted_matches):
+            for upper_key, key in reversed(matches):
+                if key and upper_key.endswith(suffix):
+                    return key
     return None
 
 
@@ -158,7 +188,6 @@ def _env_var_normalize(url: str) -> CondaUrl:
     Normalizes url by using env vars
     """
     res = urlparse(url)
-    res_replaced = copy.copy(res)
 
     def make_netloc(
         username: Optional[str], password: Optional[str], host: str, port: Optional[int]
@@ -192,30 +221,21 @@ def _env_var_normalize(url: str) -> CondaUrl:
 
     if res.username:
         user_env_var = _detect_used_env_var(res.username, ["USERNAME", "USER"])
-        if user_env_var:
-            res_replaced = res_replaced._replace(
-                netloc=make_netloc(
-                    username=f"${user_env_var}",
-                    password=res_replaced.password,
-                    host=get_or_raise(res_replaced.hostname),
-                    port=res_replaced.port,
-                )
-            )
     if res.password:
         password_env_var = _detect_used_env_var(
             res.password, ["PASSWORD", "PASS", "TOKEN", "KEY"]
         )
-        if password_env_var:
-            res_replaced = res_replaced._replace(
-                netloc=make_netloc(
-                    username=res_replaced.username,
-                    password=f"${password_env_var}",
-                    host=get_or_raise(res_replaced.hostname),
-                    port=res_replaced.port,
-                )
-            )
+    # Collect all replacements and rebuild the url once at the end.
+    replacements = {}
+    if user_env_var or password_env_var:
+        replacements["netloc"] = make_netloc(
+            username=f"${user_env_var}" if user_env_var else res.username,
+            password=f"${password_env_var}" if password_env_var else res.password,
+            host=get_or_raise(res.hostname),
+            port=res.port,
+        )
 
-    _token_match = token_pattern.search(res.path)
+    _token_match = token_pattern.search(res.path) if "/t/" in res.path else None
     token = _token_match.groups()[1][3:] if _token_match else None
     if token:
         token_env_var = _detect_used_env_var(
@@ -225,12 +245,13 @@ def _env_var_normalize(url: str) -> CondaUrl:
             # maybe we should raise here if we have mismatched env vars
             logger.warning("token url detected without env var")
         else:
-            new_path = token_pattern.sub(rf"\1/t/${token_env_var}\3", res_replaced.path)
-            res_replaced = res_replaced._replace(path=new_path)
+            replacements["path"] = token_pattern.sub(
+                rf"\1/t/${token_env_var}\3", res.path
+            )
 
     return CondaUrl(
         raw_url=url,
-        env_var_url=urlunparse(res_replaced),
+        env_var_url=urlunparse(res._replace(**replacements)),
         user=res.username,
         user_env_var=user_env_var,
         password=res.password,
@@ -1,45 +1,49 @@
 from __future__ import annotations
 
+import os
 import re
 import subprocess
 
-from itertools import chain
+from pathlib import Path
 
 from migrate_code import Migration, get_repo_root
 
 from conda_lock.scripts.vendor_poetry.vendor_helpers import (
     Requirement,
     get_directly_vendored_dependencies,
+    get_imported_modules,
     get_vendor_namespace,
     get_vendor_root,
     merge_requirements,
+    prefetch_sdists,
     req_to_req_obj,
+    strip_upper_bounds,
 )
 
 
 m = Migration("Vendor poetry")
 
+POETRY_IMPORT_RE = re.compile(r"^(\s*)(import|from) poetry\b", re.MULTILINE)
+
 directly_vendored_dependencies = get_directly_vendored_dependencies()
 
 
 @m.add_stage(1, "Add vendored dependency requirements to conda-lock")
 def add_vendored_requirements() -> None:
-    # The list of requirements which we should add
-    relevant_requirements: list[Requirement] = []
-
-    # Iterate over cleo, poetry, and poetry-core
-    for dep in directly_vendored_dependencies.values():
-        # Get the list of requirements as a list of strings.
-        # Typical string: ('cachecontrol[filecache] (>=0.12.9,<0.13.0); '
-        #                  'python_version >= "3.6" and python_version < "4.0"')
-        req_list = dep._sdist_obj.requires_dist
-
-        for req_str in req_list:
-            req: Requirement | None = req_to_req_obj(req_str, dep)
-            if req is None:
-                continue
-            else:
-                relevant_requirements.append(req)
+    prefetch_sdists(directly_vendored_dependencies.values())
+    # The list of requirements which we should add, collected from the
+    # requires_dist of cleo, poetry, and poetry-core.
+    # Typical string: ('cachecontrol[filecache] (>=0.12.9,<0.13.0); '
+    #                  'python_version >= "3.6" and python_version < "4.0"')
+    relevant_requirements: list[Requirement] = [
+        req
+        for req in (
+            req_to_req_obj(req_str, dep)
+            for dep in directly_vendored_dependencies.values()
+            for req_str in dep._sdist_obj.requires_dist
+        )
+        if req is not None
+    ]
 
     # Some of the requirements may occur multiple times, so we should merge them.
     merged_requirements: dict[str, Requirement] = merge_requirements(
@@ -55,82 +59,78 @@ def add_vendored_requirements() -> None:
     # Update the requirements.txt file
 
     requirements_txt_file = get_repo_root() / "requirements.txt"
-    requirements_txt = requirements_txt_file.read_text()
+    requirements_txt = requirements_txt_file.read_text(encoding="utf-8")
 
     # Remove some requirements which are redundant
     for line in ["poetry <1.2", "requests >=2"]:
         requirements_txt = requirements_txt.replace(line + "\n", "")
     filtered_requirements["requests"].sources.append("conda-lock")
 
-    for requirement in filtered_requirements.values():
-        # Construct the pair of lines to append to requirements.txt.
-        # e.g. ('# poetry, poetry-core:\n'
-        #       'importlib-metadata >=1.7.0,<2.0.0; python_version <= 3.7')
-        requirement_line = requirement.as_requirements_txt_line()
-        requirements_txt += requirement_line + "\n"
+    # Construct the pairs of lines to append to requirements.txt.
+    # e.g. ('# poetry, poetry-core:\n'
+    #       'importlib-metadata >=1.7.0,<2.0.0; python_version <= 3.7')
+    requirements_txt += "".join(
+        requirement.as_requirements_txt_line() + "\n"
+        for requirement in filtered_requirements.values()
+    )
 
-    requirements_txt_file.write_text(requirements_txt)
+    requirements_txt_file.write_text(requirements_txt, encoding="utf-8")
 
 
 @m.add_stage(2, "Update pypi_solver.py to use vendored Poetry imports")
 def modify_vendored_imports() -> None:
+    changed_files: list[Path] = []
     for src_file in [get_repo_root() / "conda_lock" / "pypi_solver.py"]:
-        src = src_file.read_text()
-        # This is the main logic for updating
-        for old, new in [
-            ("poetry", f"{get_vendor_namespace()}.poetry"),
-        ]:
-            src = src.replace(f"import {old}", f"import {new}")
-            src = src.replace(f"from {old}", f"from {new}")
-        src_file.write_text(src)
+        src = src_file.read_text(encoding="utf-8")
+        # This is the main logic for updating: rewrite both "import poetry..."
+        # and "from poetry..." statements in a single pass.
+        src, num_replaced = POETRY_IMPORT_RE.subn(
+            rf"\g<1>\g<2> {get_vendor_namespace()}.poetry", src
+        )
+        if num_replaced:
+            src_file.write_text(src, encoding="utf-8")
+            changed_files.append(src_file)
+    if not changed_files:
+        return
     print("Run pre-commit to fix formatting. (Expected to show failing stages.)")
-    subprocess.run(
-        [
-            "pre-commit",
-            "run",
-            "--files",
-            get_repo_root() / "conda_lock" / "pypi_solver.py",
-        ]
-    )
+    subprocess.run(["pre-commit", "run", "--files", *map(str, changed_files)])
     print("Pre-commit complete. Code should be fixed now.")
 
 
 @m.add_stage(3, "Remove pexpect, requests_toolbelt, and shellingham as dependencies")
 def remove_unnecessary_dependencies() -> None:
     to_remove = ["pexpect", "requests-toolbelt", "shellingham"]
-    subprocess.check_output(["pipreqs", str(get_vendor_root() / "poetry")])
-    poetry_requirements_txt = (
-        get_vendor_root() / "poetry" / "requirements.txt"
-    ).read_text()
-    poetry_requirements: list[str] = []
-    for line in poetry_requirements_txt.splitlines():
-        pkg_name = line.split("==")[0].strip("- ").replace("_", "-")
-        poetry_requirements.append(pkg_name)
+    # Scan the imports in-process rather than running pipreqs on the sources.
+    poetry_requirements: set[str] = {
+        module.replace("_", "-")
+        for module in get_imported_modules(get_vendor_root() / "poetry")
+    }
     assert all(pkg_name not in poetry_requirements for pkg_name in to_remove)
-    conda_lock_requirements_txt = (get_repo_root() / "requirements.txt").read_text()
-    new_requirements_txt = ""
-    for line in conda_lock_requirements_txt.splitlines():
-        if any(line.startswith(f"{pkg_name} ") for pkg_name in to_remove):
-            continue
-        new_requirements_txt += line + "\n"
-    (get_repo_root() / "requirements.txt").write_text(new_requirements_txt)
-    (get_vendor_root() / "poetry" / "requirements.txt").unlink()
+    requirements_txt_file = get_repo_root() / "requirements.txt"
+    conda_lock_requirements_txt = requirements_txt_file.read_text(encoding="utf-8")
+    to_remove_prefixes = tuple(f"{pkg_name} " for pkg_name in to_remove)
+    new_requirements_txt = "".join(
+        line + "\n"
+        for line in conda_lock_requirements_txt.splitlines()
+        if not line.startswith(to_remove_prefixes)
+    )
+    requirements_txt_file.write_text(new_requirements_txt, encoding="utf-8")
 
 
 @m.add_stage(4, "Remove upper bounds on poetry dependencies")
 def remove_upper_bounds() -> None:
-    conda_lock_requirements_txt = (get_repo_root() / "requirements.txt").read_text()
-    new_requirements = ""
-    for line1, line2 in zip(
-        conda_lock_requirements_txt.splitlines(),
-        conda_lock_requirements_txt.splitlines()[1:],
-    ):
-        if ",<" in line2 and line1.startswith("# ") and "poetry" in line1:
-            line2 = re.sub(r",<[0-9.]+", "", line2)
-        if new_requirements == "":
-            new_requirements = line1 + "\n"
-        new_requirements += line2 + "\n"
-    (get_repo_root() / "requirements.txt").write_text(new_requirements)
+    requirements_txt_file = get_repo_root() / "requirements.txt"
+    conda_lock_requirements_txt = requirements_txt_file.read_text(encoding="utf-8")
+    new_lines: list[str] = []
+    previous = ""
+    for line in conda_lock_requirements_txt.splitlines():
+        # Only strip bounds from requirements sourced from poetry, as indicated by
+        # the comment on the preceding line.
+        if ",<" in line and previous.startswith("# ") and "poetry" in previous:
+            line = strip_upper_bounds(line)
+        new_lines.append(line + "\n")
+        previous = line
+    requirements_txt_file.write_text("".join(new_lines), encoding="utf-8")
 
 
 @m.add_stage(5, "Use 'vendoring sync' to vendor dependencies")
@@ -142,11 +142,15 @@ def vendor_dependencies() -> None:
 
 @m.add_stage(6, "Delete botched license file copies")
 def delete_botched_license_files() -> None:
-    vr = get_vendor_root()
-    for license_file in chain(
-        vr.glob("poetry_core.*LICENSE*"), vr.glob("poetry_core.*COPYING*")
-    ):
-        license_file.unlink()
+    # Equivalent to globbing for "poetry_core.*LICENSE*" and "poetry_core.*COPYING*",
+    # but reads the directory only once.
+    with os.scandir(get_vendor_root()) as entries:
+        for entry in entries:
+            package, dot, rest = entry.name.partition(".")
+            if package != "poetry_core" or not dot:
+                continue
+            if "LICENSE" in rest or "COPYING" in rest:
+                os.unlink(entry.path)
 
 
 @m.add_stage(7, "Recreate license files")
@@ -157,12 +161,15 @@ def add_poetry_root_licenses() -> None:
     They are all MIT licenses.
     This does not deal with the vendored dependencies of Poetry Core.
     """
+    prefetch_sdists(directly_vendored_dependencies.values())
+    destination_dir = get_vendor_root()
+    destination_dir.mkdir(parents=True, exist_ok=True)
     for dep_data in directly_vendored_dependencies.values():
         license = dep_data._root_license
         assert license.is_mit
-        destination_dir = get_vendor_root()
-        destination_dir.mkdir(parents=True, exist_ok=True)
-        (destination_dir / f"{dep_data.name}.LICENSE").write_text(license.text)
+        (destination_dir / f"{dep_data.name}.LICENSE").write_text(
+            license.text, encoding="utf-8"
+        )
 
 
 @m.add_stage(8, "Describe vendored dependencies in conda-lock LICENSE")
@@ -174,6 +181,7 @@ def collect_poetry_core_vendored_dependencies() -> None:
     (We only need to vendor a single file from cleo, so its vendored
     dependencies are not relevant.)
     """
+    prefetch_sdists(directly_vendored_dependencies.values())
     # The only vendored dependencies should exist in poetry-core.
     for dep_name, dep in directly_vendored_dependencies.items():
         dep.discovered_licenses = [dep._root_license]
@@ -186,7 +194,7 @@ def collect_poetry_core_vendored_dependencies() -> None:
     discovered_vendored_dependencies = poetry_core.search_vendored_dependencies()
 
     conda_lock_license_file = get_repo_root() / "LICENSE"
-    conda_lock_license = conda_lock_license_file.read_text()
+    conda_lock_license = conda_lock_license_file.read_text(encoding="utf-8")
     licenses_md = """\
 # Vendored licenses
 
@@ -204,37 +212,24 @@ Conda lock vendors (and subvendors) several Python packages to reduce the number
 ## Poetry
 
 """
-    conda_lock_license += "\n".join(
-        [f"* {dep.describe_short()}" for dep in directly_vendored_dependencies.values()]
-    )
-    licenses_md += "\n".join(
-        [
-            f"* {dep.describe_markdown()}"
-            for dep in directly_vendored_dependencies.values()
-        ]
-    )
-    conda_lock_license += "\n"
-    licenses_md += "\n"
+    # Accumulate the lines of both documents and join them once at the end.
+    conda_lock_license_parts = [conda_lock_license]
+    licenses_md_parts = [licenses_md]
     # Print subdependencies of poetry-core at the next level of indentation.
     assert list(directly_vendored_dependencies.keys())[-1] == "poetry-core"
-    conda_lock_license += "\n".join(
-        [
-            f"  * {dep.describe_short()}"
-            for dep in discovered_vendored_dependencies.values()
-        ]
-    )
-    licenses_md += "\n".join(
-        [
-            f"  * {dep.describe_markdown()}"
-            for dep in discovered_vendored_dependencies.values()
-        ]
-    )
-    conda_lock_license += "\n"
-    licenses_md += "\n"
+    for indent, deps in [
+        ("", directly_vendored_dependencies),
+        ("  ", discovered_vendored_dependencies),
+    ]:
+        for dep in deps.values():
+            conda_lock_license_parts.append(f"{indent}* {dep.describe_short()}\n")
+            licenses_md_parts.append(f"{indent}* {dep.describe_markdown()}\n")
     licenses_md_file = get_vendor_root() / "LICENSES.md"
-    conda_lock_license += (
+    conda_lock_license_parts.append(
         f"\nFor more detailed information, please refer to "
         f"{licenses_md_file.relative_to(get_repo_root())}\n"
     )
-    conda_lock_license_file.write_text(conda_lock_license)
-    licenses_md_file.write_text(licenses_md)
+    conda_lock_license = "".join(conda_lock_license_parts)
+    licenses_md = "".join(licenses_md_parts)
+    conda_lock_license_file.write_text(conda_lock_license, encoding="utf-8")
+    licenses_md_file.write_text(licenses_md, encoding="utf-8")
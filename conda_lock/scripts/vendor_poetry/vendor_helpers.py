@@ -1,64 +1,112 @@
 from __future__ import annotations
 
+import ast
+import os
 import re
+import sys
 import tarfile
 
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from functools import cache, cached_property
 from io import BytesIO
 from pathlib import Path
 from tempfile import NamedTemporaryFile
-from typing import Any, cast
+from typing import Any, Iterable, Iterator, cast
 
 import pkginfo
 import requests
 import toml
 
 from migrate_code import get_repo_root
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 
 def get_pyproject_toml() -> dict[str, Any]:
-    return toml.loads((get_repo_root() / "pyproject.toml").read_text())
+    return toml.loads((get_repo_root() / "pyproject.toml").read_text(encoding="utf-8"))
 
 
+@cache
 def get_vendor_root() -> Path:
     return get_repo_root() / get_pyproject_toml()["tool"]["vendoring"]["destination"]
 
 
+@cache
 def get_vendor_namespace() -> Path:
     return get_pyproject_toml()["tool"]["vendoring"]["namespace"]
 
 
 def get_vendor_txt() -> str:
     file = get_pyproject_toml()["tool"]["vendoring"]["requirements"]
-    return (get_repo_root() / file).read_text()
+    return (get_repo_root() / file).read_text(encoding="utf-8")
+
+
+def iter_python_files(root: Path) -> Iterator[str]:
+    """Yield the paths of all .py files under root"""
+    # os.walk avoids allocating a Path object for every entry, unlike Path.rglob.
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(".py"):
+                yield os.path.join(dirpath, filename)
 
 
+def get_imported_modules(root: Path) -> set[str]:
+    """Collect the top-level modules imported by the Python files under root"""
+    modules: set[str] = set()
+    for path in iter_python_files(root):
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules.update(alias.name.partition(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                modules.add(node.module.partition(".")[0])
+    return modules
+
+
+@cache
 def get_directly_vendored_dependencies() -> dict[str, DependencyData]:
     directly_vendored_dependencies: dict[str, DependencyData] = {}
-    for line in get_vendor_txt().splitlines():
-        line = line.strip()
-        if not ("poetry" in line or "cleo" in line):
+    for raw_line in get_vendor_txt().splitlines():
+        line = raw_line.strip()
+        # Skip blank lines, comments, and anything other than poetry or cleo.
+        if not line or line[0] == "#":
             continue
-        if line.startswith("#"):
-            continue
-        if line == "":
+        if "poetry" not in line and "cleo" not in line:
             continue
         dep = DependencyData.from_line(line)
         directly_vendored_dependencies[dep.name] = dep
     return directly_vendored_dependencies
 
 
+def download_sdist(url: str) -> bytes:
+    response = requests.get(url, allow_redirects=True)
+    response.raise_for_status()
+    return response.content
+
+
+def prefetch_sdists(deps: Iterable[DependencyData]) -> None:
+    """Download the sdists of several dependencies concurrently"""
+    deps = [dep for dep in deps if dep._prefetched_content is None]
+    if not deps:
+        return
+    # Only the downloads run in the pool: cached_property holds a lock shared by
+    # all instances before Python 3.12, so the threads must not go through it.
+    with ThreadPoolExecutor() as executor:
+        contents = executor.map(download_sdist, [dep.sdist_url for dep in deps])
+        for dep, content in zip(deps, contents):
+            dep._prefetched_content = content
+
+
 class License(BaseModel):
     text: str
     destination_file: Path
 
-    @property
+    @cached_property
     def is_mit(self) -> bool:
         return normalized_str(get_mit_body()) in normalized_str(self.text)
 
-    @property
+    @cached_property
     def copyright_lines(self) -> set[str]:
         copyright_lines = {
             line.strip().replace("©", "(c)").rstrip(".")
@@ -73,6 +121,7 @@ class DependencyData(BaseModel):
     version: str | None = None
     discovered_licenses: list[License] = []
     directly_vendored: bool
+    _prefetched_content: bytes | None = PrivateAttr(default=None)
 
     @classmethod
     def from_line(cls, line: str) -> DependencyData:
@@ -85,7 +134,7 @@ class DependencyData(BaseModel):
             version = None
         return cls(name=name, version=version, directly_vendored=True)
 
-    @property
+    @cached_property
     def _sdist_obj(self) -> pkginfo.SDist:
         with NamedTemporaryFile() as f:
             bytes_io = self._tarfile_obj.fileobj
@@ -95,18 +144,21 @@ class DependencyData(BaseModel):
             sdist = pkginfo.SDist(f.name)
         return sdist
 
-    @cached_property
-    def _tarfile_obj(self) -> tarfile.TarFile:
+    @property
+    def sdist_url(self) -> str:
         if self.version is None:
             raise RuntimeError(f"Cannot get tarfile for {self.name} without version.")
-        url = (
+        return (
             f"https://pypi.io/packages/source/{self.name[0]}/{self.name}"
             f"/{self.name}-{self.version}.tar.gz"
         )
-        response = requests.get(url, allow_redirects=True)
-        response.raise_for_status()
-        tarfile_bytes = response.content
-        return tarfile.open(fileobj=BytesIO(tarfile_bytes))
+
+    @cached_property
+    def _tarfile_obj(self) -> tarfile.TarFile:
+        content = self._prefetched_content
+        if content is None:
+            content = download_sdist(self.sdist_url)
+        return tarfile.open(fileobj=BytesIO(content))
 
     def tarinfo_to_str(self, tarinfo: tarfile.TarInfo) -> str:
         file_handle = self._tarfile_obj.extractfile(tarinfo)
@@ -125,6 +177,10 @@ class DependencyData(BaseModel):
         )
 
     def search_vendored_dependencies(self) -> dict[str, DependencyData]:
+        return self._vendored_dependencies
+
+    @cached_property
+    def _vendored_dependencies(self) -> dict[str, DependencyData]:
         candidate_licenses = [
             m
             for m in self._tarfile_obj.getmembers()
@@ -299,10 +355,25 @@ def normalized_str(s: str) -> str:
     return " ".join(nonempty)
 
 
+def strip_upper_bounds(line: str) -> str:
+    """Remove all ",<x.y.z" specifiers from a requirement line."""
+    parts: list[str] = []
+    start = 0
+    while (idx := line.find(",<", start)) != -1:
+        end = idx + 2
+        while end < len(line) and line[end] in "0123456789.":
+            end += 1
+        # Keep ",<" when it isn't followed by a version, e.g. ",<=".
+        parts.append(line[start:idx] if end > idx + 2 else line[start:end])
+        start = end
+    parts.append(line[start:])
+    return "".join(parts)
+
+
 @cache
 def get_mit_body() -> str:
     repo_root = get_repo_root()
-    full_text = (repo_root / "LICENSE").read_text()
+    full_text = (repo_root / "LICENSE").read_text(encoding="utf-8")
     first_block = full_text.split("\n---\n")[0]
     start = first_block.find("Permission is hereby granted")
     mit_body = first_block[start:].replace("\n", " ").replace("  ", " ").strip()
@@ -325,6 +396,41 @@ class Requirement(BaseModel):
         return requirement_line
 
 
+@cache
+def get_potentially_relevant_python_versions() -> tuple[tuple[int, int], ...]:
+    # '>=3.6'
+    conda_lock_requires_python = get_pyproject_toml()["project"]["requires-python"]
+
+    # "", "6"
+    empty, min_minor_str = conda_lock_requires_python.split(">=3.")
+
+    assert empty == ""
+
+    # 6
+    min_minor = int(min_minor_str)
+
+    # ((3, 6), (3, 7), (3, 8), ... (3, 19))
+    return tuple((3, minor) for minor in range(min_minor, 20))
+
+
+@cache
+def get_relevant_python_versions(
+    python_requirements: str,
+) -> tuple[tuple[int, int], ...]:
+    """The potentially relevant python versions which satisfy the markers"""
+    # Replace "x.y" with "(x, y)", e.g. "3.6" -> "(3, 6)"
+    python_requirements = re.sub(r"\"(\d+)\.(\d+)\"", r"(\1, \2)", python_requirements)
+    return tuple(
+        python_version
+        for python_version in get_potentially_relevant_python_versions()
+        if eval(
+            python_requirements,
+            {"__builtins__": {}},
+            {"python_version": python_version},
+        )
+    )
+
+
 def req_to_req_obj(req: str, dep: DependencyData) -> Requirement | None:
     # Typical req: ('cachecontrol[filecache] (>=0.12.9,<0.13.0); '
     #               'python_version >= "3.6" and python_version < "4.0"')
@@ -357,38 +463,13 @@ def req_to_req_obj(req: str, dep: DependencyData) -> Requirement | None:
     if python_requirements is None:
         effective_python_requirements = None
     else:
-        # Replace "x.y" with "(x, y)", e.g. "3.6" -> "(3, 6)"
-        python_requirements = re.sub(
-            r"\"(\d+)\.(\d+)\"", r"(\1, \2)", python_requirements
+        potentially_relevant_python_versions = list(
+            get_potentially_relevant_python_versions()
+        )
+        # Many requirements share the same markers, so their evaluation is cached.
+        relevant_python_versions = list(
+            get_relevant_python_versions(python_requirements)
         )
-
-        # '>=3.6'
-        conda_lock_requires_python = get_pyproject_toml()["project"]["requires-python"]
-
-        # "", "6"
-        empty, min_minor_str = conda_lock_requires_python.split(">=3.")
-
-        assert empty == ""
-
-        # 6
-        min_minor = int(min_minor_str)
-
-        # [(3, 6), (3, 7), (3, 8), ... (3, 20)]
-        potentially_relevant_python_versions = [
-            (3, minor) for minor in range(min_minor, 20)
-        ]
-
-        # All the potentially relevant python versions which satisfy the
-        # python_version constraints
-        relevant_python_versions = [
-            python_version
-            for python_version in potentially_relevant_python_versions
-            if eval(
-                python_requirements,
-                {"__builtins__": {}},
-                {"python_version": python_version},
-            )
-        ]
 
         # Skip requirement if isn't compatible with relevant Python versions
         if len(relevant_python_versions) == 0:
@@ -415,7 +496,8 @@ def req_to_req_obj(req: str, dep: DependencyData) -> Requirement | None:
                     f"{relevant_python_versions}"
                 )
     req_obj = Requirement(
-        name=name,
+        # Names are used repeatedly as dict keys when merging requirements.
+        name=sys.intern(name),
         version_requirements=version_requirements,
         python_requirements=effective_python_requirements,
         sources=[dep.name],
@@ -426,13 +508,17 @@ def req_to_req_obj(req: str, dep: DependencyData) -> Requirement | None:
 def merge_requirements(
     relevant_requirements: list[Requirement],
 ) -> dict[str, Requirement]:
+    # Group the requirements by name in a single pass.
+    requirements_by_name: dict[str, list[Requirement]] = defaultdict(list)
+    for req in relevant_requirements:
+        requirements_by_name[req.name].append(req)
     merged_requirements: dict[str, Requirement] = {}
-    for req_name in set(req.name for req in relevant_requirements):
+    for req_name, reqs in requirements_by_name.items():
         # Simply concatenate the version specifiers.
         merged_specifiers = ",".join(
             req.version_requirements
-            for req in relevant_requirements
-            if req.name == req_name and req.version_requirements is not None
+            for req in reqs
+            if req.version_requirements is not None
         )
         # Simplify by hand a few special cases
         if merged_specifiers == ">=0.6.0,<0.7.0,>=0.6.2,<0.7.0":
@@ -441,18 +527,9 @@ def merge_requirements(
             merged_specifiers = ">=1.7.0,<2.0.0"
 
         # Get the set of distinct Python version requirements.
-        python_requirements_set = {
-            req.python_requirements
-            for req in relevant_requirements
-            if req.name == req_name
-        }
+        python_requirements_set = {req.python_requirements for req in reqs}
         # The direct dependencies which source this requirement.
-        sources = {
-            source
-            for req in relevant_requirements
-            if req.name == req_name
-            for source in req.sources
-        }
+        sources = {source for req in reqs for source in req.sources}
         # In our case, no package has multiple distinct Python version requirements, so
         # we don't need to handle that case.
         if len(python_requirements_set) > 1:
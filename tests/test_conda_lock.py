@@ -29,6 +29,7 @@ from flaky import flaky
 from freezegun import freeze_time
 
 from conda_lock import __version__, pypi_solver
+from conda_lock._vendor.poetry.utils.helpers import merge_dicts
 from conda_lock.conda_lock import (
     DEFAULT_FILES,
     DEFAULT_LOCKFILE_NAME,
@@ -815,6 +816,18 @@ def test_prepare_repositories_pool():
     )
 
 
+def test_merge_dicts_keeps_nested_dict_subclass():
+    class Table(dict):
+        pass
+
+    inner = Table(url="https://example.com/simple")
+    config = {"repositories": {"example": inner}}
+    merge_dicts(config, {"repositories": {"example": {"priority": "primary"}}})
+
+    assert config["repositories"]["example"] is inner
+    assert inner == {"url": "https://example.com/simple", "priority": "primary"}
+
+
 def test_spec_poetry(poetry_pyproject_toml: Path):
     virtual_package_repo = default_virtual_package_repodata()
     with virtual_package_repo: